@@ -0,0 +1,241 @@
+"""
+Benchmarks of settings evaluation and urlconfs building.
+
+Usage::
+
+    python benchmarks.py [--save results.json] [--compare baseline.json]
+                         [--threshold 0.2] [--filter name]
+
+With ``--compare`` benchmarks slower than baseline by more than threshold are
+reported and exit status is 1.
+"""
+from __future__ import print_function
+
+import json
+import optparse
+import os
+import sys
+import timeit
+import types
+from functools import partial
+
+from django.conf import settings
+from django.core import urlresolvers
+
+from classsettings import Settings, from_env
+from classsettings.urls import Scope, url, fast_reverse
+
+settings.configure()
+
+BENCHMARKS = []
+MODULE_NAME = 'classsettings_benchmarks_settings'
+
+
+def benchmark(name, factory, number=1, repeat=5):
+    """
+    Registers benchmark, `factory` prepares data and returns function to be
+    timed, it's called only when benchmark runs. Result is the best time of
+    `repeat` runs of `number` calls.
+    """
+    BENCHMARKS.append((name, factory, number, repeat))
+
+
+def make_settings(name, bases, methods_count, prefix='SETTING'):
+    attrs = {'__module__': MODULE_NAME}
+    for i in range(methods_count):
+        attrs['%s_%d' % (prefix, i)] = lambda self, i=i: i
+    return type(Settings)(name, bases, attrs)
+
+
+def settings_evaluation(methods_count):
+    def run():
+        make_settings('BenchSettings', (Settings,), methods_count)
+    return run
+
+
+def settings_inheritance(depth, methods_count=10):
+    def run():
+        bases = (Settings,)
+        for level in range(depth):
+            cls = make_settings('BenchSettings%d' % level, bases,
+                                methods_count, prefix='LEVEL%d' % level)
+            bases = (cls,)
+    return run
+
+
+def view(request, **kwargs):
+    return None
+
+
+def scope_flat(urls_count):
+    def run():
+        with Scope(regex='^', name='root') as root:
+            for i in range(urls_count):
+                url('{0}url%d/$' % i, view, name='{0}_%d' % i)
+        return root.urls
+    return run
+
+
+def scope_nested(depth, urls_per_scope=10):
+    def nest(level):
+        with Scope(regex='{0}level%d/' % level, name='{0}_%d' % level):
+            for i in range(urls_per_scope):
+                url('{0}url%d/$' % i, view, name='{0}_%d' % i)
+            if level < depth:
+                nest(level + 1)
+
+    def run():
+        with Scope(regex='^', name='root') as root:
+            nest(1)
+        return root.urls
+    return run
+
+
+def wide_tree(scopes_count, urls_per_scope):
+    with Scope(regex='^', name='root') as root:
+        for i in range(scopes_count):
+            with Scope(regex='{0}section%d/' % i, name='{0}_%d' % i):
+                for j in range(urls_per_scope):
+                    url('{0}page%d/(?P<pk>\\d+)/$' % j, view,
+                        name='{0}_%d' % j)
+    return root
+
+
+def url_resolution(tree, calls=100, scopes_count=50, urls_per_scope=100):
+    root = wide_tree(scopes_count, urls_per_scope)
+    patterns = [root.resolver()] if tree else root.urls
+    resolver = urlresolvers.RegexURLResolver(r'^/', patterns)
+    path = '/section%d/page%d/1/' % (scopes_count - 1, urls_per_scope - 1)
+
+    def run():
+        for i in range(calls):
+            resolver.resolve(path)
+    return run
+
+
+def urls_access(calls=1000):
+    root = wide_tree(50, 100)
+
+    def run():
+        for i in range(calls):
+            root.urls
+    return run
+
+
+def url_reversing(fast, calls=1000):
+    root = wide_tree(50, 100)
+    urlconf = types.ModuleType('classsettings_benchmarks_urls')
+    urlconf.urlpatterns = root.urls
+    urlconf.reverse_index = root.reverse_index()
+    reverse = fast_reverse if fast else urlresolvers.reverse
+
+    def run():
+        for i in range(calls):
+            reverse('root_%d_%d' % (i % 50, i % 100), urlconf,
+                    kwargs={'pk': i})
+    return run
+
+
+@from_env(key='CLASSSETTINGS_BENCH_SET')
+def env_set(): pass
+
+
+@from_env(key='CLASSSETTINGS_BENCH_UNSET')
+def env_unset(): return 'default'
+
+
+def from_env_lookups(getter, calls=10000):
+    def run():
+        for i in range(calls):
+            getter()
+    return run
+
+
+for count in (10, 100, 1000):
+    benchmark('settings_methods_%d' % count,
+              partial(settings_evaluation, count))
+for depth in (10, 50):
+    benchmark('settings_inheritance_%d' % depth,
+              partial(settings_inheritance, depth))
+benchmark('from_env_set', partial(from_env_lookups, env_set))
+benchmark('from_env_default', partial(from_env_lookups, env_unset))
+for count in (1000, 5000):
+    benchmark('scope_flat_%d' % count, partial(scope_flat, count), repeat=3)
+for depth in (10, 50):
+    benchmark('scope_nested_%d' % depth, partial(scope_nested, depth),
+              repeat=3)
+benchmark('resolve_flat_5000', partial(url_resolution, tree=False), repeat=3)
+benchmark('resolve_tree_5000', partial(url_resolution, tree=True), repeat=3)
+benchmark('resolve_wide_flat_200',
+          partial(url_resolution, tree=False, scopes_count=1,
+                  urls_per_scope=200, calls=1000), repeat=3)
+benchmark('resolve_wide_tree_200',
+          partial(url_resolution, tree=True, scopes_count=1,
+                  urls_per_scope=200, calls=1000), repeat=3)
+benchmark('urls_access_5000', urls_access, repeat=3)
+benchmark('reverse_django_5000', partial(url_reversing, fast=False), repeat=3)
+benchmark('reverse_fast_5000', partial(url_reversing, fast=True), repeat=3)
+
+
+def run_benchmarks(name_filter=None):
+    os.environ['CLASSSETTINGS_BENCH_SET'] = 'value'
+    sys.modules[MODULE_NAME] = types.ModuleType(MODULE_NAME)
+    results = {}
+    try:
+        for name, factory, number, repeat in BENCHMARKS:
+            if name_filter and name_filter not in name:
+                continue
+
+            timer = timeit.Timer(factory())
+            results[name] = min(timer.repeat(repeat, number)) / number
+            print('%-30s %10.3f ms' % (name, results[name] * 1000))
+    finally:
+        sys.modules.pop(MODULE_NAME)
+        os.environ.pop('CLASSSETTINGS_BENCH_SET')
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns list of `(name, baseline time, new time)` of regressed benchmarks.
+    """
+    regressions = []
+    for name in sorted(results):
+        if (name in baseline and
+                results[name] > baseline[name] * (1 + threshold)):
+            regressions.append((name, baseline[name], results[name]))
+    return regressions
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('--save', metavar='PATH', help='store results as JSON')
+    parser.add_option('--compare', metavar='PATH', help='JSON baseline')
+    parser.add_option('--threshold', type='float', default=0.2,
+                      help='allowed slowdown ratio, default: %default')
+    parser.add_option('--filter',
+                      help='run benchmarks containing given string')
+    options, args = parser.parse_args(argv)
+
+    results = run_benchmarks(options.filter)
+
+    if options.save:
+        with open(options.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, options.threshold)
+        for name, old, new in regressions:
+            print('REGRESSION %s: %.3f ms -> %.3f ms (%+.0f%%)' %
+                  (name, old * 1000, new * 1000, (new / old - 1) * 100))
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,3 @@
-from .settings import Settings, Config
+from .settings import Settings, Config, dependencies, invalidate
 from .env import from_env, get_env_setting
+from .frozen import finalize
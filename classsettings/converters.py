@@ -0,0 +1,183 @@
+"""
+Converters for :func:`classsettings.env.from_env` ``through`` argument.
+
+Converters are memoized by raw value, values which are not strings (defaults
+returned by decorated function) are passed as is. Errors are reported by
+``from_env`` with variable name and converter's ``type_name``.
+"""
+import json
+import re
+
+from django.utils import six
+
+from .utils import fresh
+
+try:
+    from urllib.parse import parse_qsl, unquote
+except ImportError:
+    from urllib import unquote
+    from urlparse import parse_qsl
+
+
+class Converter(object):
+    """
+    Memoized string converter, copies of mutable cached results are returned.
+
+    :param func: callable converting string, should raise :class:`ValueError`
+    :param type_name: name of result type used in error messages
+    """
+    def __init__(self, func, type_name):
+        self.func = func
+        self.type_name = type_name
+        self._cache = {}
+
+    def __call__(self, value):
+        if not isinstance(value, six.string_types):
+            return value
+
+        try:
+            return fresh(self._cache[value])
+        except KeyError:
+            result = self._cache[value] = self.func(value)
+            return fresh(result)
+
+    def __repr__(self):
+        return '<Converter %s>' % self.type_name
+
+
+_TRUE = frozenset(('1', 'true', 'yes', 'on', 'y', 't'))
+_FALSE = frozenset(('0', 'false', 'no', 'off', 'n', 'f', ''))
+_COMMA = re.compile(r'\s*,\s*')
+_URL = re.compile(r'^(?P<scheme>[\w+.-]+)://(?P<netloc>[^/?]*)'
+                  r'(?:/(?P<path>[^?]*))?(?:\?(?P<query>.*))?$')
+_HOST = re.compile(r'^(?P<host>\[[^\]]*\]|[^:]*)(?::(?P<port>\d+))?$')
+
+
+def _to_bool(value):
+    value = value.strip().lower()
+    if value in _TRUE:
+        return True
+    elif value in _FALSE:
+        return False
+
+    raise ValueError('"%s" is not a boolean value' % value)
+
+
+def _split(value):
+    value = value.strip()
+    return tuple(_COMMA.split(value)) if value else ()
+
+
+def _parse_url(value):
+    match = _URL.match(value.strip())
+    if match is None:
+        raise ValueError('"%s" is not an URL' % value)
+
+    return match.groupdict()
+
+
+def _parse_netloc(netloc):
+    # Like urlparse, user info ends at the last `@`
+    userinfo, _, hostinfo = netloc.rpartition('@')
+    user, _, password = userinfo.partition(':')
+    match = _HOST.match(hostinfo)
+    if match is None:
+        raise ValueError('"%s" is not a valid host and port' % hostinfo)
+
+    host, port = match.group('host', 'port')
+    return (unquote(user), unquote(password), unquote(host).strip('[]'),
+            int(port) if port else '')
+
+
+DATABASE_ENGINES = {
+    'postgres': 'django.db.backends.postgresql_psycopg2',
+    'postgresql': 'django.db.backends.postgresql_psycopg2',
+    'pgsql': 'django.db.backends.postgresql_psycopg2',
+    'postgis': 'django.contrib.gis.db.backends.postgis',
+    'mysql': 'django.db.backends.mysql',
+    'mysqlgis': 'django.contrib.gis.db.backends.mysql',
+    'oracle': 'django.db.backends.oracle',
+    'sqlite': 'django.db.backends.sqlite3',
+    'spatialite': 'django.contrib.gis.db.backends.spatialite',
+}
+
+CACHE_BACKENDS = {
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'pylibmc': 'django.core.cache.backends.memcached.PyLibMCCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+
+
+def _to_database(value):
+    url = _parse_url(value)
+    scheme = url['scheme']
+    if scheme not in DATABASE_ENGINES:
+        raise ValueError('Unknown database scheme "%s"' % scheme)
+
+    user, password, host, port = _parse_netloc(url['netloc'])
+    name = unquote(url['path'] or '')
+    if scheme in ('sqlite', 'spatialite') and not name:
+        name = ':memory:'
+
+    result = {
+        'ENGINE': DATABASE_ENGINES[scheme],
+        'NAME': name,
+        'USER': user,
+        'PASSWORD': password,
+        'HOST': host,
+        'PORT': port,
+    }
+    if url['query']:
+        result['OPTIONS'] = dict(parse_qsl(url['query']))
+
+    return result
+
+
+def _to_cache(value):
+    url = _parse_url(value)
+    scheme, netloc, path = url['scheme'], url['netloc'], url['path']
+    if scheme not in CACHE_BACKENDS:
+        raise ValueError('Unknown cache scheme "%s"' % scheme)
+
+    if scheme == 'file':
+        location = '/' + (path or '')
+    elif scheme in ('memcached', 'pylibmc'):
+        if netloc:
+            hosts = _COMMA.split(netloc)
+            location = hosts[0] if len(hosts) == 1 else hosts
+        else:
+            location = 'unix:/' + (path or '')
+    elif scheme == 'redis':
+        location = value.strip()
+    else:
+        location = netloc
+
+    result = {'BACKEND': CACHE_BACKENDS[scheme], 'LOCATION': location}
+    if url['query']:
+        result['OPTIONS'] = dict(parse_qsl(url['query']))
+
+    return result
+
+
+boolean = Converter(_to_bool, 'boolean')
+integer = Converter(int, 'integer')
+floating = Converter(float, 'float')
+comma_list = Converter(_split, 'comma separated list')
+json_value = Converter(json.loads, 'JSON')
+database_url = Converter(_to_database, 'database URL')
+cache_url = Converter(_to_cache, 'cache URL')
+
+
+def list_of(converter):
+    """
+    Returns converter of comma separated list with each item converted with
+    given converter or callable, e.g. ``through=list_of(int)``.
+    """
+    type_name = getattr(converter, 'type_name',
+                        getattr(converter, '__name__', ''))
+    return Converter(lambda value: tuple(converter(v) for v in _split(value)),
+                     'list of %s' % type_name)
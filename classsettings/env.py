@@ -1,9 +1,11 @@
 import functools
 import os
+import re
 
-from django.core.exceptions import ImproperlyConfigured
+from django.utils import six
 
-from .utils import defaultargs
+from .profile import Profiler
+from .utils import defaultargs, fresh, improperly_configured
 
 
 @defaultargs
@@ -14,30 +16,282 @@ def from_env(key=None, through=None):
     :class:`ImproperlyConfigured` if it returns `None`.
 
     :param key: env. variable name, defaults to function's name
-    :param through: callable should be applied to result
+    :param through: callable should be applied to result, :class:`ValueError`
+                    raised by :mod:`classsettings.converters` converter is
+                    reported with :class:`ImproperlyConfigured`
     """
     def decorator(func):
         @functools.wraps(func)
         def decorated(*args, **kwargs):
-            try:
-                value = get_env_setting(key or func.__name__)
-            except ImproperlyConfigured as e:
+            env_key = key or func.__name__
+            value = _lookup(env_key)
+            if value is None:
                 value = func(*args, **kwargs)
                 if value is None:
-                    raise e
+                    raise _missing(env_key)
 
-            return through(value) if through else value
+                return _apply(env_key, value, through) if through else value
+
+            return convert(env_key, value, through) if through else value
 
         return decorated
     return decorator
 
 
-def get_env_setting(setting):
+class DictSource(object):
     """
-    Gets the environment setting and raises exception if it isn't present.
+    Environment source which looks up variables in given dictionary.
+    """
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def refresh(self):
+        pass
+
+
+class EnvironSource(DictSource):
+    """
+    Looks up variables in :data:`os.environ` on each call.
+    """
+    def __init__(self):
+        super(EnvironSource, self).__init__(os.environ)
+
+
+class SnapshotSource(DictSource):
+    """
+    Looks up variables in copy of :data:`os.environ`, copy is taken on
+    creation and on each :meth:`refresh` call.
+    """
+    def __init__(self):
+        super(SnapshotSource, self).__init__({})
+        self.refresh()
+
+    def refresh(self):
+        self.values = dict(os.environ)
+
+
+class ChainSource(object):
+    """
+    Looks up variables in given sources, first found value is returned.
+    """
+    def __init__(self, *sources):
+        self.sources = sources
+
+    def get(self, key, default=None):
+        for source in self.sources:
+            value = source.get(key)
+            if value is not None:
+                return value
+
+        return default
+
+    def refresh(self):
+        for source in self.sources:
+            source.refresh()
+
+
+# `.env` files of such size and larger are parsed with mmap
+MMAP_THRESHOLD = 64 * 1024
+
+_DOTENV_LINE = re.compile(r'^[ \t]*(?:export[ \t]+)?([A-Za-z_][A-Za-z0-9_.]*)'
+                          r'[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.M)
+_DOTENV_LINE_BYTES = re.compile(_DOTENV_LINE.pattern.encode('ascii'), re.M)
+# Quoted value, optionally followed by comment
+_DOTENV_QUOTED = re.compile(r'^(?:"((?:[^"\\]|\\.)*)"|\'([^\']*)\')'
+                            r'[ \t]*(?:#.*)?$', re.S)
+_DOTENV_ESCAPES = re.compile(r'\\([\\"nrt])')
+_DOTENV_ESCAPED = {'n': '\n', 'r': '\r', 't': '\t', '"': '"', '\\': '\\'}
+
+
+def read_file(path):
+    """
+    Returns decoded content of file.
+    """
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+def read_dotenv(path):
+    """
+    Returns variables of `.env` file, large files are parsed with mmap
+    without reading them into memory at once.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            return parse_dotenv(f.read().decode('utf-8'))
+
+        import mmap
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return parse_dotenv(mapped)
+        finally:
+            mapped.close()
+
+
+def parse_dotenv(content):
+    """
+    Parses `KEY=value` lines of `.env` file content into dictionary.
+    Content is text or UTF-8 encoded buffer (bytes, mmap).
+
+    Supports comments, `export` prefix, single and double quoted values.
+    """
+    is_text = isinstance(content, six.text_type)
+    pattern = _DOTENV_LINE if is_text else _DOTENV_LINE_BYTES
+    result = {}
+    for match in pattern.finditer(content):
+        key, value = match.groups()
+        if not is_text:
+            key, value = key.decode('utf-8'), value.decode('utf-8')
+        quoted = _DOTENV_QUOTED.match(value)
+        if quoted:
+            double, single = quoted.groups()
+            if double is None:
+                value = single
+            else:
+                value = _DOTENV_ESCAPES.sub(
+                    lambda m: _DOTENV_ESCAPED[m.group(1)], double)
+        else:
+            value = value.split(' #', 1)[0].rstrip()
+
+        result[key] = value
+
+    return result
+
+
+class DotEnvSource(DictSource):
+    """
+    Looks up variables parsed from `.env` file, file is read on creation and
+    on each :meth:`refresh` call. Missing file is treated as empty.
+    """
+    def __init__(self, path):
+        super(DotEnvSource, self).__init__({})
+        self.path = path
+        self.refresh()
+
+    def refresh(self):
+        if os.path.isfile(self.path):
+            self.values = read_dotenv(self.path)
+        else:
+            self.values = {}
+
+
+class SecretsDirSource(DictSource):
     """
+    Looks up variables in Docker/Kubernetes style secrets directory: file
+    name is variable name and file content (without trailing newline) is
+    value. Directory is read on creation and on each :meth:`refresh` call,
+    missing directory is treated as empty.
+    """
+    def __init__(self, path):
+        super(SecretsDirSource, self).__init__({})
+        self.path = path
+        self.refresh()
+
+    def refresh(self):
+        values = {}
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                path = os.path.join(self.path, name)
+                if not name.startswith('.') and os.path.isfile(path):
+                    values[name] = read_file(path).rstrip('\r\n')
+
+        self.values = values
+
+
+_source = EnvironSource()
+_converted = {}
+
+
+def get_source():
+    return _source
+
+
+def set_source(source):
+    """
+    Replaces environment source used by :func:`get_env_setting`, source
+    should implement `get(key, default=None)` and `refresh()` methods.
+    """
+    global _source
+    _source = source
+    _converted.clear()
+
+
+def refresh():
+    """
+    Refreshes current environment source and drops cached conversions.
+    """
+    _source.refresh()
+    _converted.clear()
+
+
+def convert(key, value, through):
+    """
+    Applies `through` to env. variable value, results are cached by variable
+    name, value and `through` callable, copies of mutable ones are returned.
+    """
+    cache_key = (key, value, through)
     try:
-        return os.environ[setting]
+        return fresh(_converted[cache_key])
     except KeyError:
-        error_msg = "Set the %s env variable" % setting
-        raise ImproperlyConfigured(error_msg)
+        result = _converted[cache_key] = _apply(key, value, through)
+        return fresh(result)
+    except TypeError:
+        # Unhashable `through`
+        return _apply(key, value, through)
+
+
+def _apply(key, value, through):
+    type_name = getattr(through, 'type_name', None)
+    try:
+        return through(value)
+    except ValueError as e:
+        if type_name is None:
+            raise
+
+        raise improperly_configured(
+            'Could not convert %s env variable to %s: %s'
+            % (key, type_name, e))
+
+
+class KeyRecorder(object):
+    """
+    Collects names of env. variables looked up while used as context manager.
+    """
+    _active = []
+
+    def __init__(self):
+        self.keys = set()
+
+    def __enter__(self):
+        KeyRecorder._active.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        KeyRecorder._active.remove(self)
+
+
+def _lookup(setting):
+    for recorder in KeyRecorder._active:
+        recorder.keys.add(setting)
+    if Profiler._active:
+        Profiler.notify('env_lookup', setting)
+
+    return _source.get(setting)
+
+
+def _missing(setting):
+    return improperly_configured("Set the %s env variable" % setting)
+
+
+def get_env_setting(setting):
+    """
+    Gets the environment setting and raises exception if it isn't present.
+    """
+    value = _lookup(setting)
+    if value is None:
+        raise _missing(setting)
+
+    return value
@@ -0,0 +1,75 @@
+"""
+Immutable compact settings values for pre-fork servers.
+
+Lists become tuples, sets frozensets, dicts :class:`FrozenDict` and native
+strings are interned. Tuples and dicts holding only such values are
+untracked by garbage collector after first collection, so collections in
+forked workers do not write to their pages.
+"""
+import gc
+
+from django.utils import six
+from django.utils.six.moves import intern
+
+
+class ImmutableMixin(object):
+    """
+    Disables dict mutation methods.
+    """
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('%s is immutable' % type(self).__name__)
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+
+class FrozenDict(ImmutableMixin, dict):
+    """
+    Immutable dict, stays ``dict`` instance for code checking it.
+    """
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return 'FrozenDict(%s)' % dict.__repr__(self)
+
+
+def freeze(value):
+    """
+    Returns immutable copy of lists, tuples, sets and dicts (subclasses are
+    kept as is) with frozen items, interns native strings.
+    """
+    value_type = type(value)
+    if value_type is str:
+        return intern(value)
+    elif value_type in (list, tuple):
+        return tuple(freeze(item) for item in value)
+    elif value_type in (set, frozenset):
+        return frozenset(freeze(item) for item in value)
+    elif value_type is dict:
+        return FrozenDict((freeze(k), freeze(v))
+                          for k, v in six.iteritems(value))
+
+    return value
+
+
+def finalize():
+    """
+    Prepares loaded settings for sharing with forked workers: collects
+    garbage, so frozen values get untracked, and moves remaining objects to
+    permanent generation with :func:`gc.freeze` (Python 3.7+).
+
+    Returns whether :func:`gc.freeze` was called.
+    """
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+        return True
+
+    return False
@@ -0,0 +1,178 @@
+"""
+Profiling of settings classes evaluation.
+
+Usage::
+
+    python -m classsettings.profile mysite.settings [--json]
+"""
+from __future__ import absolute_import, print_function
+
+import sys
+import time
+
+
+def _tracemalloc():
+    # Imported on first use, it's import is not cheap
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+    return tracemalloc
+
+
+def _label(cls):
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+
+class Profiler(object):
+    """
+    Collects timings of settings classes evaluation, cache hits and misses
+    of memoized methods and env. variables lookups while used as context
+    manager.
+
+    Memory is measured with :mod:`tracemalloc` where it is available.
+    """
+    _active = []
+
+    def __init__(self):
+        self.classes = {}
+        self.env_lookups = {}
+        self._order = []
+        self._started_tracing = False
+
+    def __enter__(self):
+        tracemalloc = _tracemalloc()
+        if tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        Profiler._active.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        Profiler._active.remove(self)
+
+        if self._started_tracing:
+            _tracemalloc().stop()
+            self._started_tracing = False
+
+    @classmethod
+    def notify(cls, event, *args):
+        for profiler in cls._active:
+            getattr(profiler, event)(*args)
+
+    @classmethod
+    def measure(cls, settings_cls, name, method, args, kwargs):
+        """
+        Calls method and notifies active profilers about it's time and
+        memory usage.
+        """
+        tracemalloc = _tracemalloc()
+        memory = tracemalloc.get_traced_memory()[0] if tracemalloc else None
+        start = time.time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            seconds = time.time() - start
+            if memory is not None:
+                memory = tracemalloc.get_traced_memory()[0] - memory
+            cls.notify('method_called', settings_cls, name, seconds, memory)
+
+    def _class_stats(self, settings_cls):
+        label = _label(settings_cls)
+        if label not in self.classes:
+            self.classes[label] = {'time': 0.0, 'methods': {}}
+            self._order.append(label)
+        return self.classes[label]
+
+    def _method_stats(self, settings_cls, name):
+        methods = self._class_stats(settings_cls)['methods']
+        if name not in methods:
+            methods[name] = {'calls': 0, 'time': 0.0, 'memory': None,
+                             'hits': 0, 'misses': 0}
+        return methods[name]
+
+    def class_evaluated(self, settings_cls, seconds):
+        self._class_stats(settings_cls)['time'] += seconds
+
+    def method_called(self, settings_cls, name, seconds, memory):
+        stats = self._method_stats(settings_cls, name)
+        stats['calls'] += 1
+        stats['time'] += seconds
+        if memory is not None:
+            stats['memory'] = (stats['memory'] or 0) + memory
+
+    def cache_hit(self, settings_cls, name):
+        self._method_stats(settings_cls, name)['hits'] += 1
+
+    def cache_miss(self, settings_cls, name):
+        self._method_stats(settings_cls, name)['misses'] += 1
+
+    def env_lookup(self, key):
+        self.env_lookups[key] = self.env_lookups.get(key, 0) + 1
+
+    def report(self):
+        """
+        Returns collected data as list of classes stats, methods are sorted
+        by time (inclusive of nested calls) descending.
+        """
+        classes = []
+        for label in self._order:
+            stats = self.classes[label]
+            methods = [dict(stats['methods'][name], name=name)
+                       for name in stats['methods']]
+            methods.sort(key=lambda m: m['time'], reverse=True)
+            classes.append({'class': label, 'time': stats['time'],
+                            'methods': methods})
+
+        return {'classes': classes, 'env_lookups': dict(self.env_lookups)}
+
+    def format_report(self):
+        report = self.report()
+        lines = []
+        for cls_stats in report['classes']:
+            lines.append('%s: %.3f ms' % (cls_stats['class'],
+                                          cls_stats['time'] * 1000))
+            for m in cls_stats['methods']:
+                memory = '-'
+                if m['memory'] is not None:
+                    memory = '%.1f KiB' % (m['memory'] / 1024.0)
+                lines.append('    %-40s %6d calls %10.3f ms %12s '
+                             '%4d hits %4d misses' %
+                             (m['name'], m['calls'], m['time'] * 1000, memory,
+                              m['hits'], m['misses']))
+
+        if report['env_lookups']:
+            lines.append('env. variables lookups:')
+            for key in sorted(report['env_lookups']):
+                lines.append('    %-40s %6d'
+                             % (key, report['env_lookups'][key]))
+
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    import json
+    import optparse
+    from django.utils import importlib
+
+    parser = optparse.OptionParser(usage='%prog [options] settings_module')
+    parser.add_option('--json', action='store_true', default=False,
+                      help='print report as JSON')
+    options, args = parser.parse_args(argv)
+    if len(args) != 1:
+        parser.error('settings module is required')
+
+    with Profiler() as profiler:
+        importlib.import_module(args[0])
+
+    if options.json:
+        print(json.dumps(profiler.report(), indent=2, sort_keys=True))
+    else:
+        print(profiler.format_report())
+
+
+if __name__ == '__main__':
+    # Profilers are looked up in importable module, not in `__main__`
+    import classsettings.profile as profile
+    profile.main(sys.argv[1:])
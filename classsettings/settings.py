@@ -1,29 +1,454 @@
-import inspect
+import copy
+import functools
 import sys
-from operator import itemgetter
+import threading
+import time
+import types
+import warnings
 
 from django.utils import six, importlib
 
+from .frozen import ImmutableMixin, freeze
+from .env import KeyRecorder
+from .profile import Profiler
+from .utils import improperly_configured
 
-def inspect_class(cls):
+
+# Class attributes which do not affect results of methods
+_BOOKKEEPING = frozenset(('__module__', '__doc__', '__dict__', '__weakref__',
+                          '__qualname__', '_instance', '_evaluation', '_lazy',
+                          '_memoize', '_workers', '_snapshot', '_freeze',
+                          '_reuse'))
+
+
+class Evaluation(object):
+    """
+    Evaluates public attributes of settings class instance.
+
+    Public methods are replaced with instance level wrappers, so calls made
+    through ``self`` are evaluated the same way and recorded in
+    ``dependencies``. With ``memoize`` each method is called at most once,
+    further calls return cached result.
+
+    With ``workers`` methods are memoized and evaluated with given number of
+    threads, method calling one being evaluated in other thread waits for it's
+    result.
+
+    With ``parent`` evaluation of base class, copies of it's results of
+    methods which are not overridden and do not depend on overridden ones are
+    reused.
+
+    With ``freeze`` values returned by :meth:`value` are frozen with
+    :func:`classsettings.frozen.freeze` and replace stored results, so
+    mutable originals are not kept alive.
+    """
+    def __init__(self, instance, memoize=False, workers=None, parent=None,
+                 freeze=False):
+        self.instance = instance
+        self.freeze = freeze
+        self.memoize = memoize or bool(workers)
+        self.workers = workers
+        self.names = [n for n in dir(instance) if not n.startswith('_')]
+        self.results = {}
+        self.dependencies = {}
+        self._methods = {}
+        self._errors = {}
+        self._running = {}
+        # Threads evaluating methods and methods threads are waiting for,
+        # used to detect circular waits
+        self._owners = {}
+        self._waiting = {}
+        # Ids of exceptions => methods which raised them first
+        self._origins = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._reused = set()
+
+        for name in self.names:
+            value = getattr(instance, name)
+            if isinstance(value, types.MethodType):
+                self._methods[name] = value
+                self.dependencies[name] = set()
+                setattr(instance, name, self._wrap(name, value))
+
+        if parent is not None:
+            self._reuse(parent)
+
+    def _reuse(self, parent):
+        """
+        Takes results of unaffected methods from evaluation of base class.
+
+        Nothing is reused if subclass overrides anything but public methods,
+        calls of private methods and attribute lookups are not tracked.
+        """
+        cls, base = type(self.instance), type(parent.instance)
+        changed = set()
+        for klass in cls.__mro__:
+            if klass not in base.__mro__:
+                changed.update(n for n in vars(klass) if n not in _BOOKKEEPING)
+
+        for name in changed:
+            if hasattr(base, name) and not parent.is_method(name):
+                return
+
+        affected = parent.dependents(changed & set(parent._methods))
+        for name, result in parent.results.items():
+            if (name in self._methods and name not in affected and
+                    name not in parent._errors):
+                # Base class values may be modified after injection
+                try:
+                    self.results[name] = copy.deepcopy(result)
+                except Exception:
+                    continue
+                self.dependencies[name] = set(parent.dependencies[name])
+                self._reused.add(name)
+
+    def __getitem__(self, name):
+        if name in self._reused:
+            return self.results[name]
+        elif name in self._methods:
+            return getattr(self.instance, name)()
+        else:
+            return getattr(self.instance, name)
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = self._stack
+            if stack and stack[-1] != name:
+                self.dependencies[stack[-1]].add(name)
+
+            if name in self._reused and not (args or kwargs):
+                return self.results[name]
+            elif args or kwargs:
+                return self._call(name, method, args, kwargs)
+            elif not self.memoize or name in stack:
+                self.results[name] = self._call(name, method)
+                return self.results[name]
+            else:
+                return self._call_once(name, method)
+
+        return wrapper
+
+    def _call(self, name, method, args=(), kwargs={}):
+        if name not in self._stack:
+            self.dependencies[name] = set()
+
+        self._stack.append(name)
+        try:
+            if Profiler._active:
+                return Profiler.measure(type(self.instance), name, method,
+                                        args, kwargs)
+            return method(*args, **kwargs)
+        finally:
+            self._stack.pop()
+
+    def _call_once(self, name, method):
+        thread = threading.current_thread()
+        with self._lock:
+            done = self._running.get(name)
+            is_owner = done is None and name not in self.results
+            if is_owner:
+                done = self._running[name] = threading.Event()
+                self._owners[name] = thread
+            elif done is not None:
+                self._check_cycle(name, thread)
+                self._waiting[thread] = name
+
+        if Profiler._active:
+            event = 'cache_miss' if is_owner else 'cache_hit'
+            Profiler.notify(event, type(self.instance), name)
+
+        if is_owner:
+            try:
+                self.results[name] = self._call(name, method)
+            except Exception:
+                self._errors[name] = exc_info = sys.exc_info()
+                self._origins.setdefault(id(exc_info[1]), name)
+                raise
+            finally:
+                with self._lock:
+                    del self._running[name]
+                    del self._owners[name]
+                done.set()
+        elif done is not None:
+            try:
+                done.wait()
+            finally:
+                with self._lock:
+                    del self._waiting[thread]
+
+        if name in self._errors:
+            six.reraise(*self._errors[name])
+        return self.results[name]
+
+    def _check_cycle(self, name, thread):
+        """
+        Raises :class:`ImproperlyConfigured` if method being evaluated in
+        other thread waits (directly or through other threads) for method
+        evaluated by given thread.
+        """
+        chain, owner = [name], self._owners.get(name)
+        while owner is not None and owner is not thread:
+            waited = self._waiting.get(owner)
+            if waited is None:
+                return
+            chain.append(waited)
+            owner = self._owners.get(waited)
+
+        if owner is thread:
+            raise improperly_configured('Circular dependency of methods: %s' %
+                                        ' -> '.join(chain))
+
+    def _evaluate_parallel(self):
+        from django.utils.six.moves import queue
+
+        names, errors = queue.Queue(), {}
+        for name in self.names:
+            if name in self._methods:
+                names.put(name)
+
+        def worker():
+            while True:
+                try:
+                    name = names.get_nowait()
+                except queue.Empty:
+                    return
+
+                try:
+                    self[name]
+                except Exception:
+                    errors[name] = sys.exc_info()
+
+        threads = [threading.Thread(target=worker)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for name in self.names:
+            if name in errors:
+                exc_type, exc_value, tb = errors[name]
+                # Report method which raised exception, not it's dependent
+                origin = self._origins.get(id(exc_value), name)
+                error = improperly_configured('Could not evaluate "%s": %s' %
+                                              (origin, exc_value))
+                six.reraise(type(error), error, tb)
+
+    def value(self, name):
+        """
+        Returns value to be injected.
+        """
+        value = self[name]
+        if self.freeze:
+            value = freeze(value)
+            self.store_frozen([(name, value)])
+        return value
+
+    def store_frozen(self, items):
+        for name, value in items:
+            if name in self.results:
+                self.results[name] = value
+
+    def is_method(self, name):
+        return name in self._methods
+
+    def items(self):
+        if self.workers:
+            self._evaluate_parallel()
+        return [(name, self[name]) for name in self.names]
+
+    def dependents(self, names):
+        """
+        Returns given names with names of all methods depending on them.
+        """
+        result, queue = set(), list(names)
+        while queue:
+            name = queue.pop()
+            if name not in result:
+                result.add(name)
+                queue.extend(n for n, deps in self.dependencies.items()
+                             if name in deps)
+        return result
+
+    def invalidate(self, names):
+        """
+        Drops cached results of given names and their dependents, returns
+        recomputed values.
+        """
+        for name in names:
+            if name not in self.names:
+                raise KeyError(name)
+
+        affected = self.dependents(names)
+        for name in affected:
+            self.results.pop(name, None)
+            self._errors.pop(name, None)
+            self._reused.discard(name)
+
+        return dict((name, self.value(name)) for name in self.names
+                    if name in affected)
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module proxy which evaluates deferred settings on first attribute access.
+
+    Replaces original module in :data:`sys.modules`, unknown attributes are
+    looked up in original module, assigned ones are set on both.
+    """
+    def __init__(self, module):
+        super(LazyModule, self).__init__(module.__name__, module.__doc__)
+        object.__setattr__(self, '_module', module)
+        object.__setattr__(self, '_pending', {})
+
+    @classmethod
+    def install(cls, module):
+        if not isinstance(module, cls):
+            module = sys.modules[module.__name__] = cls(module)
+        return module
+
+    def defer(self, evaluation):
+        for name in evaluation.names:
+            if evaluation.is_method(name):
+                self.__dict__.pop(name, None)
+                self._pending[name] = evaluation
+            else:
+                self._pending.pop(name, None)
+                setattr(self, name, evaluation.value(name))
+
+    def __getattr__(self, name):
+        if name == '__all__' and not hasattr(self._module, '__all__'):
+            # Star import reads `__dict__` without `__all__`, which misses
+            # pending names
+            return [n for n in dir(self) if not n.startswith('_')]
+        elif name in self._pending:
+            value = self._pending[name].value(name)
+            del self._pending[name]
+            setattr(self, name, value)
+            return value
+
+        return getattr(self._module, name)
+
+    def __setattr__(self, name, value):
+        self._pending.pop(name, None)
+        object.__setattr__(self, name, value)
+        setattr(self._module, name, value)
+
+    def __dir__(self):
+        names = set(dir(self._module))
+        names.update(self.__dict__)
+        names.update(self._pending)
+        return sorted(names)
+
+
+def get_evaluation(cls):
     cls._instance = instance = cls()
     module = importlib.import_module(cls.__module__)
-    public_attributes = []
-    for attr_name in dir(instance):
-        if not attr_name.startswith('_'):
-            value = getattr(instance, attr_name)
-            value = value() if inspect.ismethod(value) else value
-            public_attributes.append((attr_name, value))
+    parent = None
+    if getattr(cls, '_reuse', False):
+        parent = next((c.__dict__['_evaluation'] for c in cls.__mro__[1:]
+                       if '_evaluation' in c.__dict__), None)
+    evaluation = Evaluation(instance, memoize=getattr(cls, '_memoize', False),
+                            workers=getattr(cls, '_workers', None),
+                            parent=parent,
+                            freeze=getattr(cls, '_freeze', False))
+    cls._evaluation = evaluation
+    return evaluation, module
+
+
+def inspect_class(cls):
+    """
+    Returns `name-value` pairs of class public attributes and class module.
+
+    If class defines ``_snapshot`` directory, values are loaded from it's
+    snapshot when one is up to date and stored there otherwise. With
+    ``_freeze`` values are frozen.
+    """
+    snapshot_dir = getattr(cls, '_snapshot', None)
+    if snapshot_dir:
+        from . import snapshot
+
+    evaluation = None
+    items = snapshot.load(cls, snapshot_dir) if snapshot_dir else None
+    if items is not None:
+        module = importlib.import_module(cls.__module__)
+    else:
+        start = time.time()
+        with KeyRecorder() as recorder:
+            evaluation, module = get_evaluation(cls)
+            items = evaluation.items()
 
-    return public_attributes, module
+        if Profiler._active:
+            Profiler.notify('class_evaluated', cls, time.time() - start)
+
+        if snapshot_dir:
+            snapshot.dump(cls, snapshot_dir, items, recorder.keys)
+
+    if getattr(cls, '_freeze', False):
+        items = [(name, freeze(value)) for name, value in items]
+        if evaluation is not None:
+            evaluation.store_frozen(items)
+
+    return items, module
+
+
+def _own_evaluation(cls):
+    """
+    Returns evaluation of given class, classes loaded from snapshot are
+    evaluated first (inherited ``_evaluation`` belongs to base class).
+    """
+    if '_evaluation' not in cls.__dict__:
+        evaluation, module = get_evaluation(cls)
+        evaluation.items()
+    return cls.__dict__['_evaluation']
+
+
+def dependencies(target):
+    """
+    Returns ``{name: set of names}`` graph of public methods calls made
+    through ``self`` for given settings class or config.
+    """
+    if isinstance(target, ConfigResult):
+        target = target.ConfigClass
+    evaluation = _own_evaluation(target)
+    return dict((k, set(v)) for k, v in evaluation.dependencies.items())
+
+
+def invalidate(target, *names):
+    """
+    Recomputes given settings of settings class or config and all settings
+    depending on them, injects new values and returns them.
+    """
+    if isinstance(target, ConfigResult):
+        values = _own_evaluation(target.ConfigClass).invalidate(names)
+        dict.update(target, values)
+    else:
+        values = _own_evaluation(target).invalidate(names)
+        module = importlib.import_module(target.__module__)
+        for attr_name, value in values.items():
+            setattr(module, attr_name, value)
+
+    return values
 
 
 class SettingsMeta(type):
 
     def __init__(cls, name, bases, attrs):
-        public_attrs, module = inspect_class(cls)
-        for attr_name, value in public_attrs:
-            setattr(module, attr_name, value)
+        if getattr(cls, '_lazy', False):
+            evaluation, module = get_evaluation(cls)
+            LazyModule.install(module).defer(evaluation)
+        else:
+            public_attrs, module = inspect_class(cls)
+            for attr_name, value in public_attrs:
+                setattr(module, attr_name, value)
 
 
 class ConfigMeta(type):
@@ -34,8 +459,23 @@ class ConfigMeta(type):
         if name == 'NewBase':
             return Class
 
-        public_attributes, module = inspect_class(Class)
-        result = ConfigResult(public_attributes, Class)
+        lazy = getattr(Class, '_lazy', False)
+        if lazy and not _LAZY_CONFIGS:
+            warnings.warn('Lazy config %s is evaluated at once: copies of '
+                          'dicts bypass overridden methods on this Python'
+                          % name, RuntimeWarning, stacklevel=2)
+            lazy = False
+
+        if lazy:
+            evaluation, module = get_evaluation(Class)
+            result = LazyConfigResult((), Class)
+            result.defer(evaluation)
+        else:
+            public_attributes, module = inspect_class(Class)
+            if getattr(Class, '_freeze', False):
+                result = FrozenConfigResult(public_attributes, Class)
+            else:
+                result = ConfigResult(public_attributes, Class)
         setattr(module, name, result)
         return result
 
@@ -68,10 +508,155 @@ class ConfigResult(dict):
         return self._ConfigClass
 
 
+class FrozenConfigResult(ImmutableMixin, ConfigResult):
+    """
+    Immutable config result.
+    """
+
+
+class Deferred(object):
+    """
+    Placeholder of not evaluated :class:`LazyConfigResult` value.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<deferred>'
+
+
+DEFERRED = Deferred()
+
+
+def _copies_use_methods():
+    """
+    Returns whether copies of dict subclasses (``dict(d)``, ``**d``) go
+    through overridden ``keys`` and ``__getitem__``. Python 2 copies their
+    storage directly, so lazy configs would leak :data:`DEFERRED` values.
+    """
+    class Probe(dict):
+        def __iter__(self):
+            return dict.__iter__(self)
+
+        def __getitem__(self, key):
+            return 'method'
+
+    probe = Probe(key='storage')
+    return (dict(probe)['key'] == 'method' and
+            (lambda **kwargs: kwargs)(**probe)['key'] == 'method')
+
+
+_LAZY_CONFIGS = _copies_use_methods()
+
+
+class LazyConfigResult(ConfigResult):
+    """
+    Config result which calls each method on first access of it's key.
+
+    Keys are stored with :data:`DEFERRED` placeholders, methods returning
+    values (``items``, ``values``, ``copy``, comparison) evaluate all pending
+    keys first. Used only where dict copies of subclasses with overridden
+    ``__iter__`` go through ``keys`` and ``__getitem__`` (Python 3).
+    """
+    def defer(self, evaluation):
+        self._pending = set()
+        for name in evaluation.names:
+            if evaluation.is_method(name):
+                dict.__setitem__(self, name, DEFERRED)
+                self._pending.add(name)
+            else:
+                dict.__setitem__(self, name, evaluation.value(name))
+
+    def _evaluate(self, key):
+        value = self.ConfigClass._evaluation.value(key)
+        dict.__setitem__(self, key, value)
+        self._pending.discard(key)
+        return value
+
+    def _evaluate_all(self):
+        for key in list(self._pending):
+            if dict.get(self, key) is DEFERRED:
+                self._evaluate(key)
+            else:
+                self._pending.discard(key)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        return self._evaluate(key) if value is DEFERRED else value
+
+    def __iter__(self):
+        # Overridden so Python 3 copies dict with `keys` and `__getitem__`
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *default):
+        if key in self:
+            self[key]
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        self._evaluate_all()
+        return dict.popitem(self)
+
+    def items(self):
+        self._evaluate_all()
+        return dict.items(self)
+
+    def values(self):
+        self._evaluate_all()
+        return dict.values(self)
+
+    if six.PY2:
+        def iteritems(self):
+            self._evaluate_all()
+            return dict.iteritems(self)
+
+        def itervalues(self):
+            self._evaluate_all()
+            return dict.itervalues(self)
+
+        def viewitems(self):
+            self._evaluate_all()
+            return dict.viewitems(self)
+
+        def viewvalues(self):
+            self._evaluate_all()
+            return dict.viewvalues(self)
+
+    def copy(self):
+        self._evaluate_all()
+        return dict(dict.items(self))
+
+    def __eq__(self, other):
+        self._evaluate_all()
+        if isinstance(other, LazyConfigResult):
+            other._evaluate_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._evaluate_all()
+        return dict.__repr__(self)
+
+
 class Settings(six.with_metaclass(SettingsMeta)):
     """
     Calls each public method of class and injects it's value into it's
     module's scope.
+
+    With ``_lazy`` methods are called on first access of module attribute.
+    With ``_freeze`` values are frozen (see :mod:`classsettings.frozen`).
     """
 
 
@@ -79,4 +664,7 @@ class Config(six.with_metaclass(ConfigMeta)):
     """
     Calls each public method of class, constructs dictionary with `name-result`
     pairs and replaces class with it.
+
+    With ``_lazy`` methods are called on first access of their keys. With
+    ``_freeze`` values and result are immutable.
     """
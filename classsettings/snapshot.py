@@ -0,0 +1,93 @@
+"""
+Pickled snapshots of evaluated settings classes.
+
+Snapshot is valid while sources of class (and it's bases) modules and values
+of env. variables looked up during evaluation stay the same.
+"""
+import hashlib
+import os
+import sys
+
+from django.utils.six.moves import cPickle as pickle
+
+from . import env
+
+
+def _source_path(path):
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+    return path
+
+
+def files_digest(paths):
+    """
+    Returns sha1 hash object of given files content (sources are used instead
+    of compiled `.pyc` files) and Python version.
+    """
+    digest = hashlib.sha1(sys.version.encode('utf-8'))
+    for path in paths:
+        with open(_source_path(path), 'rb') as source:
+            digest.update(source.read())
+
+    return digest
+
+
+def snapshot_path(cls, directory):
+    return os.path.join(directory,
+                        '%s.%s.pickle' % (cls.__module__, cls.__name__))
+
+
+def checksum(cls, env_keys):
+    """
+    Returns hash of class modules sources and given env. variables values.
+    """
+    module_names = sorted(set(c.__module__ for c in cls.__mro__[:-1]))
+    digest = files_digest(sys.modules[name].__file__ for name in module_names)
+    for key in sorted(env_keys):
+        digest.update(repr((key, env.get_source().get(key))).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def load(cls, directory):
+    """
+    Returns list of `name-value` pairs stored for given class or `None` if
+    snapshot does not exist or is stale.
+    """
+    try:
+        with open(snapshot_path(cls, directory), 'rb') as snapshot:
+            env_keys, digest, items = pickle.load(snapshot)
+
+        if digest == checksum(cls, env_keys):
+            return items
+    except Exception:
+        pass
+
+    return None
+
+
+def dump(cls, directory, items, env_keys):
+    """
+    Stores `name-value` pairs of given class, creates directory if needed.
+    Returns `False` if values could not be pickled or written.
+    """
+    try:
+        data = (sorted(env_keys), checksum(cls, env_keys), items)
+        content = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+
+    path = snapshot_path(cls, directory)
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(temp_path, 'wb') as snapshot:
+            snapshot.write(content)
+        os.rename(temp_path, path)
+    except (IOError, OSError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+    return True
@@ -1,11 +1,75 @@
+import ast
+import copy
 import inspect
 import itertools
+import os
+import re
+import threading
 import traceback
+import weakref
 
+from django.conf import settings
 from django.core import urlresolvers
 from django.core.exceptions import ImproperlyConfigured
 from django.conf.urls import url as django_url
-from django.utils import six
+from django.utils import six, importlib
+from django.utils.encoding import iri_to_uri
+from django.utils.http import urlquote
+from django.utils.regex_helper import normalize
+
+from .snapshot import files_digest
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    # Python < 3.3
+    from collections import Sequence
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    # Django 1.4
+    from django.utils.encoding import force_unicode as force_text
+
+
+# Resolved views shared by urls, keys are dotted paths and view classes
+_views_cache = {}
+
+
+def get_view(view):
+    """
+    Returns view callable of dotted path or view class (calls it's
+    ``as_view()``), results are cached, so same declarations share one view.
+    Other values are returned as is.
+    """
+    if isinstance(view, six.string_types):
+        key = view
+    elif callable(getattr(view, 'as_view', None)):
+        key = view
+    else:
+        return view
+
+    try:
+        return _views_cache[key]
+    except KeyError:
+        if isinstance(view, six.string_types):
+            result = urlresolvers.get_callable(view)
+            if not isinstance(result, six.string_types):
+                result = get_view(result)
+        else:
+            result = view.as_view()
+            try:
+                # Used to find dotted path of view for urls snapshot
+                result.view_class = view
+            except AttributeError:
+                pass
+
+        _views_cache[key] = result
+        return result
+
+
+def clear_views_cache():
+    _views_cache.clear()
 
 
 class Context(object):
@@ -13,25 +77,30 @@ class Context(object):
     Dict-like object, can contain reference to parent context.
 
     Keys seek order: own keys, parent context and raises KeyError if not found.
+
+    Flattened view of the whole chain is cached, cache is dropped (and
+    ``version`` is increased) when own variables or any ancestor change.
     """
+    __slots__ = ('_own_context', '_flat', '_children', '_parent', 'version',
+                 '__weakref__')
+
     def __init__(self, parent=None, **variables):
-        self._parent = parent
         self._own_context = variables
+        self._flat = None
+        self._children = ()
+        self._parent = None
+        self.version = 0
+        self.parent = parent
 
     def __iter__(self):
         return self._own_context.__iter__()
 
     def __getitem__(self, key):
-        context = self
-        while context:
-            if key in context._own_context:
-                return context._own_context[key]
-
-            context = context.parent
-        raise KeyError(key)
+        return self._flatten()[key]
 
     def __setitem__(self, key, value):
         self._own_context[key] = value
+        self._invalidate()
 
     def __str__(self):
         items = ', '.join("'%s': %s" % (k, self[k]) for k in self.keys())
@@ -40,21 +109,30 @@ class Context(object):
     def __repr__(self):
         return self.__str__()
 
-    def dict(self):
-        result, context = dict(), self
-        while context:
-            for k in context:
-                result.setdefault(k, context[k])
+    def _flatten(self):
+        if self._flat is None:
+            flat = dict(self._parent._flatten()) if self._parent else {}
+            flat.update(self._own_context)
+            self._flat = flat
+
+        return self._flat
+
+    def _invalidate(self):
+        # Descendants' caches are built from ancestors' ones, so if own cache
+        # is already dropped, descendants' are dropped too
+        if self._flat is not None:
+            self._flat = None
+            self.version += 1
+            for ref in self._children:
+                child = ref()
+                if child is not None:
+                    child._invalidate()
 
-            context = context.parent
-        return result
+    def dict(self):
+        return dict(self._flatten())
 
     def keys(self):
-        result, context = list(), self
-        while context:
-            result.extend(k for k in context if k not in result)
-            context = context.parent
-        return result
+        return list(self._flatten())
 
     @property
     def parent(self):
@@ -63,12 +141,69 @@ class Context(object):
     @parent.setter
     def parent(self, value):
         if value is None or isinstance(value, type(self)):
+            if self._parent is not None:
+                self._parent._children = [r for r in self._parent._children
+                                          if r() not in (None, self)]
+            if value is not None:
+                # Most contexts have no children, list is created on demand
+                if not value._children:
+                    value._children = []
+                value._children.append(weakref.ref(self))
+
             self._parent = value
+            self._invalidate()
         else:
             raise TypeError('Value "%s" is not "%s" instance' %
                             (value, type(self).__name__))
 
 
+class UrlsView(Sequence):
+    """
+    Read-only view of scope's flattened urls list, reflects it's changes.
+    """
+    __slots__ = ('_urls',)
+
+    def __init__(self, urls):
+        self._urls = urls
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._urls[index])
+        return self._urls[index]
+
+    def __len__(self):
+        return len(self._urls)
+
+    def __iter__(self):
+        return iter(self._urls)
+
+    def __reversed__(self):
+        return reversed(self._urls)
+
+    def __contains__(self, url_obj):
+        return url_obj in self._urls
+
+    def __eq__(self, other):
+        if isinstance(other, (UrlsView, tuple, list)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return tuple(self) + tuple(other)
+
+    def __radd__(self, other):
+        return tuple(other) + tuple(self)
+
+    def __repr__(self):
+        return 'UrlsView(%r)' % (self._urls,)
+
+
 class Scope(object):
     """
     Allows urls defined with :func:`classsettings.urls.url` within scope use
@@ -76,31 +211,51 @@ class Scope(object):
     lookups for modules.
     """
 
-    # Globally accessed object, not threadsafe at all
-    __CURRENT = None
+    __slots__ = ('_regex', '_view', '_name', '_own_context', '_cache',
+                 '_parent', 'childs', '_urls', '_urls_view')
+
+    # Urls of lazy scope and it's childs resolve views on first access
+    lazy = False
+
+    # Stack of entered scopes, own for each thread
+    _local = threading.local()
+
+    @classmethod
+    def _stack(cls):
+        if not hasattr(cls._local, 'stack'):
+            cls._local.stack = []
+        return cls._local.stack
 
     @classmethod
     def get_current(cls):
-        return cls.__CURRENT
+        stack = cls._stack()
+        return stack[-1] if stack else None
 
     @classmethod
     def _set_current(cls, scope):
-        if cls.__CURRENT:
-            cls.__CURRENT._add_child(scope)
+        current = cls.get_current()
+        if current:
+            current._add_child(scope)
 
-        cls.__CURRENT = scope
+        cls._stack().append(scope)
 
     @classmethod
     def _close_current(cls):
-        cls.__CURRENT = cls.__CURRENT.parent
+        cls._stack().pop()
 
     def __init__(self, regex=None, view=None, name=None, **context_variables):
         self._regex = regex
         self._view = view
         self._name = name
         self._own_context = Context(None, **context_variables)
+        self._cache = {}
         self.parent = None
         self.childs = []
+        # Flattened urls, built on first access and kept up to date by
+        # `_add_child` and `_del_child`. Scope with built urls has them built
+        # for all descendant scopes too.
+        self._urls = None
+        self._urls_view = None
 
     def __enter__(self):
         Scope._set_current(self)
@@ -109,9 +264,6 @@ class Scope(object):
     def __exit__(self, exc_type, exc_value, tb):
         Scope._close_current()
 
-        if exc_value:
-            raise exc_value
-
     def __getitem__(self, key):
         if key in self._own_context:
             return self._own_context[key]
@@ -126,20 +278,50 @@ class Scope(object):
     def _add_child(self, scope_or_url):
         self.childs.append(scope_or_url)
 
-        if isinstance(scope_or_url, type(self)):
+        if isinstance(scope_or_url, Scope):
             scope_or_url.parent = self
 
+        if self._urls is not None:
+            self._update_urls(len(self._urls), 0, _child_urls(scope_or_url))
+
     def _del_child(self, scope_or_url):
+        if self._urls is not None:
+            offset = self._urls_offset(self.childs.index(scope_or_url))
+            count = len(_child_urls(scope_or_url))
+
         self.childs.remove(scope_or_url)
 
-        if isinstance(scope_or_url, type(self)):
+        if isinstance(scope_or_url, Scope):
             scope_or_url.parent = None
 
+        if self._urls is not None:
+            self._update_urls(offset, count, [])
+
+    def _urls_offset(self, index):
+        """
+        Returns position of `index`th child's first url in flattened urls.
+        """
+        return sum(len(child._urls) if isinstance(child, Scope) else 1
+                   for child in self.childs[:index])
+
+    def _update_urls(self, offset, count, urls):
+        """
+        Replaces `count` flattened urls at `offset` with given ones in own and
+        parents' urls.
+        """
+        scope = self
+        while scope is not None and scope._urls is not None:
+            scope._urls[offset:offset + count] = urls
+            parent = scope.parent
+            if parent is not None and parent._urls is not None:
+                offset += parent._urls_offset(parent.childs.index(scope))
+            scope = parent
+
     def _format_string(self, value, base):
         args = () if base is None else (base,)
         
         try:
-            return value.format(*args, **(self.context.dict()))
+            return value.format(*args, **self.context._flatten())
         except (IndexError, KeyError, ValueError) as e:
             if type(e) is IndexError:
                 msg = 'Could not format "%s", base value is None' % value
@@ -154,11 +336,44 @@ class Scope(object):
             raise (ImproperlyConfigured(msg) if msg else e)
 
     def _resolve(self, regex, view, kwargs, name, prefix):
-        url_scope = Scope(regex, view, name)
-        self._add_child(url_scope)
-        args = url_scope.regex, url_scope.view, kwargs, url_scope.name, prefix
-        self._del_child(url_scope); del url_scope
-        return args
+        return (self._join_regex(regex, self.regex),
+                self._join_view(view, self.view), kwargs,
+                self._join_name(name, self.name), prefix)
+
+    def _join_regex(self, regex, base):
+        return base if regex is None else self._format_string(regex, base)
+
+    def _join_name(self, name, base):
+        return base if name is None else self._format_string(name, base)
+
+    def _join_view(self, view, base):
+        if view is None:
+            view = base
+        elif isinstance(base, six.string_types):
+            if isinstance(view, six.string_types):
+                view = self._format_string(view, base)
+            return get_view(view)
+        elif inspect.ismodule(base):
+            if isinstance(view, six.string_types):
+                view = getattr(base, view)
+
+        return view if isinstance(view, six.string_types) else get_view(view)
+
+    def _resolved(self, attr):
+        """
+        Returns resolved regex, view or name, result is cached until own
+        context (which also follows parents' contexts) changes.
+        """
+        context = self.context
+        context._flatten()
+        cached = self._cache.get(attr)
+        if cached is None or cached[0] != context.version:
+            base = getattr(self.parent, attr) if self.parent else None
+            join = getattr(self, '_join_' + attr)
+            value = join(getattr(self, '_' + attr), base)
+            cached = self._cache[attr] = (context.version, value)
+
+        return cached[1]
 
     @property
     def context(self):
@@ -175,75 +390,550 @@ class Scope(object):
 
     @property
     def regex(self):
-        if self.parent:
-            if self._regex is None:
-                return self.parent.regex
-            else:
-                return self._format_string(self._regex, self.parent.regex)
-        else:
-            if self._regex is None:
-                return None
-            else:
-                return self._format_string(self._regex, None)
+        return self._resolved('regex')
 
     @property
     def view(self):
-        view = self._view
-
-        if self.parent:
-            if view is None:
-                view = self.parent.view
-            else:
-                if isinstance(self.parent.view, six.string_types):
-                    if isinstance(self._view, six.string_types):
-                        view_path = self._format_string(self._view, self.parent.view)
-                        view = urlresolvers.get_callable(view_path)
-                    else:
-                        view = urlresolvers.get_callable(self._view)
-                elif inspect.ismodule(self.parent.view):
-                    if isinstance(self._view, six.string_types):
-                        view = getattr(self.parent.view, self._view)
-
-        as_view = getattr(view, 'as_view', None)
-        view = as_view() if callable(as_view) else view
-
-        return view
+        return self._resolved('view')
 
     @property
     def name(self):
-        if self.parent:
-            if self._name is None:
-                return self.parent.name
-            else:
-                return self._format_string(self._name, self.parent.name)
-        else:
-            if self._name is None:
-                return None
-            else:
-                return self._format_string(self._name, None)
+        return self._resolved('name')
     
-    def _urls_generator(self):
+    @property
+    def urls(self):
+        """
+        Read-only view of flattened urls of scope and it's descendants.
+        """
+        if self._urls is None:
+            urls = []
+            for child in self.childs:
+                urls.extend(_child_urls(child))
+            self._urls = urls
+            self._urls_view = UrlsView(urls)
+
+        return self._urls_view
+
+    def _url_entries(self, prefixes=()):
+        regex = self.regex
+        if regex and _LITERAL_PREFIX.match(regex):
+            prefixes += (regex,)
+
         for child in self.childs:
-            if isinstance(child, type(self)):
-                for url_obj in child.urls:
-                    yield url_obj
+            if isinstance(child, Scope):
+                for entry in child._url_entries(prefixes):
+                    yield entry
             else:
-                yield child
+                yield child, prefixes
 
-    @property
-    def urls(self):
-        return tuple(self._urls_generator())
+    def resolver(self):
+        """
+        Returns :class:`ScopeResolver` which can be used instead of
+        :attr:`urls`, e.g. ``urlpatterns = [root.resolver()]``.
+        """
+        return ScopeResolver('^', _group_urls(list(self._url_entries()), ''))
+
+    def reverse_index(self):
+        """
+        Returns :class:`ReverseIndex` of urls names.
+        """
+        return ReverseIndex(self.urls)
+
+    def is_lazy(self):
+        scope = self
+        while scope:
+            if scope.lazy:
+                return True
+            scope = scope.parent
+        return False
 
     def url(self, regex, view, kwargs=None, name=None, prefix=''):
         """
         Modifies url's url pattern view and name only.
         """
-        url_args = self._resolve(regex, view, kwargs, name, prefix)
-        url_obj = django_url(*url_args)
+        if self.is_lazy() and not isinstance(view, (list, tuple)):
+            # Includes are resolved by django's RegexURLResolver on demand
+            url_obj = LazyURLPattern(self._join_regex(regex, self.regex),
+                                     self, view, kwargs,
+                                     self._join_name(name, self.name), prefix)
+        else:
+            url_args = self._resolve(regex, view, kwargs, name, prefix)
+            url_obj = django_url(*url_args)
+
         self._add_child(url_obj)
         return url_obj    
 
 
+def _child_urls(child):
+    return child.urls._urls if isinstance(child, Scope) else [child]
+
+
+class LazyScope(Scope):
+    """
+    Scope which defers views resolution (imports and ``as_view`` calls) of
+    urls defined within it and it's child scopes until url's view is
+    accessed first time, e.g. when url is resolved.
+
+    View is resolved with scope variables at the time of first access.
+    Django's ``reverse`` accesses views of all urls, use
+    :func:`fast_reverse` to keep them lazy.
+    """
+    __slots__ = ()
+
+    lazy = True
+
+
+class LazyURLPattern(urlresolvers.RegexURLPattern):
+    """
+    Url pattern resolving it's view with scope on first :attr:`callback`
+    access.
+    """
+    def __init__(self, regex, scope, view, default_args=None, name=None,
+                 prefix=''):
+        super(LazyURLPattern, self).__init__(regex, '', default_args, name)
+        self._declaration = (scope, view, prefix)
+
+    @property
+    def callback(self):
+        if self._callback is None:
+            scope, view, prefix = self._declaration
+            if scope is None:
+                # Loaded from snapshot, view is dotted path
+                view = get_view(view)
+            else:
+                view = scope._join_view(view, scope.view)
+                if isinstance(view, six.string_types):
+                    if prefix:
+                        view = prefix + '.' + view
+                    view = urlresolvers.get_callable(view)
+
+            self._callback = view
+        return self._callback
+
+
+# Anchored regex without special characters, e.g. `^projects/`
+_LITERAL_PREFIX = re.compile(r'^\^(?:[^\\.^$*+?{}\[\]|()]|\\[^\w])+$')
+_ESCAPED_CHAR = re.compile(r'\\(.)')
+
+
+def _relative(regex, base):
+    return '^' + regex[len(base):] if base else regex
+
+
+def _next_prefix(url_obj, prefixes, base):
+    """
+    Returns shortest literal scope prefix longer than `base` url can be
+    nested under.
+    """
+    regex = url_obj.regex.pattern
+    if not _is_anchored(regex):
+        # Top level alternation applies to whole regex, prefix can't be cut
+        return None
+
+    for prefix in prefixes:
+        quantifier = regex[len(prefix):len(prefix) + 1]
+        if (len(prefix) > len(base) and prefix.startswith(base) and
+                regex.startswith(prefix) and
+                quantifier not in ('*', '+', '?', '{')):
+            return prefix
+
+    return None
+
+
+def _group_urls(entries, base):
+    """
+    Groups consecutive urls sharing literal prefix into nested resolvers,
+    returns patterns relative to `base`.
+    """
+    patterns, i = [], 0
+    while i < len(entries):
+        url_obj, prefixes = entries[i]
+        prefix = _next_prefix(url_obj, prefixes, base)
+        if prefix is None:
+            pattern = copy.copy(url_obj)
+            pattern._regex = _relative(url_obj.regex.pattern, base)
+            pattern._regex_dict = {}
+            patterns.append(pattern)
+            i += 1
+        else:
+            j = i + 1
+            while (j < len(entries) and
+                   _next_prefix(entries[j][0], entries[j][1], base) == prefix):
+                j += 1
+
+            children = _group_urls(entries[i:j], prefix)
+            patterns.append(ScopeResolver(_relative(prefix, base), children))
+            i = j
+
+    return patterns
+
+
+# Constructs which can not be moved into alternation regex: numbered and
+# named backreferences, conditional groups and inline flags
+_NOT_COMBINABLE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]')
+_NAMED_GROUP = re.compile(r'(?<!\\)\(\?P<\w+>')
+# Python 2 `re` supports up to 100 groups
+_MAX_COMBINED_GROUPS = 99
+
+
+def _is_anchored(regex):
+    """
+    Returns whether regex starts with `^` and has no top level alternation,
+    so it matches at path start only.
+    """
+    if not regex.startswith('^'):
+        return False
+
+    depth, i = 0, 1
+    while i < len(regex):
+        char = regex[i]
+        if char == '\\':
+            i += 1
+        elif char == '[':
+            # `]` right after `[` or `[^` is literal
+            i += 2 if regex[i + 1:i + 2] == '^' else 1
+            i += 1 if regex[i + 1:i + 2] == ']' else 0
+            while i + 1 < len(regex) and regex[i + 1] != ']':
+                i += 2 if regex[i + 1] == '\\' else 1
+            i += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return False
+        i += 1
+
+    return True
+
+
+def _is_combinable(pattern):
+    regex = getattr(pattern, '_regex', None)
+    return (isinstance(pattern, urlresolvers.RegexURLPattern) and
+            isinstance(regex, six.string_types) and _is_anchored(regex) and
+            not _NOT_COMBINABLE.search(regex))
+
+
+class CombinedPatterns(object):
+    """
+    Consecutive url patterns matched with single alternation regex. Pattern
+    of first matching alternative resolves path, so args and kwargs are the
+    same as if patterns were tried one by one.
+    """
+    def __init__(self, patterns):
+        self.patterns = patterns
+        self._by_group = {}
+        parts, group = [], 1
+        for pattern in patterns:
+            # Each pattern is wrapped into group closing after it's own
+            # groups, so match's `lastindex` is the index of wrapping group.
+            # Group names are dropped, so siblings may share them.
+            parts.append('(%s)' % _NAMED_GROUP.sub('(', pattern._regex))
+            self._by_group[group] = pattern
+            group += pattern.regex.groups + 1
+        self.regex = re.compile('|'.join(parts), re.UNICODE)
+        if self.regex.groups != group - 1:
+            raise ValueError('Patterns groups are changed by combining')
+
+    def resolve(self, path):
+        match = self.regex.match(path)
+        if match:
+            return self._by_group[match.lastindex].resolve(path)
+        return None
+
+
+def _combine_run(run):
+    if len(run) > 1:
+        try:
+            return [CombinedPatterns(run)]
+        except (re.error, ValueError):
+            pass
+    return run
+
+
+def _combine_patterns(patterns):
+    """
+    Replaces runs of combinable patterns with :class:`CombinedPatterns`,
+    patterns are kept as is if their combined regex is not valid.
+    """
+    entries, run, groups = [], [], 0
+    for pattern in patterns:
+        if not _is_combinable(pattern):
+            entries.extend(_combine_run(run))
+            entries.append(pattern)
+            run, groups = [], 0
+            continue
+
+        pattern_groups = pattern.regex.groups + 1
+        if groups + pattern_groups > _MAX_COMBINED_GROUPS:
+            entries.extend(_combine_run(run))
+            run, groups = [], 0
+        run.append(pattern)
+        groups += pattern_groups
+
+    entries.extend(_combine_run(run))
+    return entries
+
+
+class ScopeResolver(urlresolvers.RegexURLResolver):
+    """
+    Resolver of :class:`Scope` tree, urls sharing literal prefix (e.g.
+    `^projects/`) are nested into child resolvers, so prefix is matched once
+    for all of them.
+
+    Consecutive child resolvers with literal prefixes are dispatched with
+    dict by first path segment instead of trying each of them, consecutive
+    anchored url patterns are matched with single alternation regex (see
+    :class:`CombinedPatterns`). Resolution order and results are the same as
+    of flat :attr:`Scope.urls`.
+    """
+    def __init__(self, regex, patterns):
+        super(ScopeResolver, self).__init__(regex, patterns)
+        literal = ''
+        if _LITERAL_PREFIX.match(regex):
+            literal = _ESCAPED_CHAR.sub(r'\1', regex[1:])
+        self.segment = None
+        if '/' in literal:
+            self.segment = literal[:literal.index('/') + 1]
+        self._plan = self._build_plan(patterns)
+
+    @staticmethod
+    def _build_plan(patterns):
+        # List of pattern lists (tried in order) and dicts of
+        # `first segment => child resolvers`
+        plan = []
+        for pattern in patterns:
+            segment = getattr(pattern, 'segment', None)
+            if segment is None:
+                if not plan or isinstance(plan[-1], dict):
+                    plan.append([])
+                plan[-1].append(pattern)
+            else:
+                if not plan or isinstance(plan[-1], list):
+                    plan.append({})
+                plan[-1].setdefault(segment, []).append(pattern)
+
+        return [_combine_patterns(step) if isinstance(step, list) else step
+                for step in plan]
+
+    def _candidates(self, path):
+        index = path.find('/')
+        segment = path[:index + 1] if index >= 0 else None
+        for step in self._plan:
+            if isinstance(step, list):
+                for pattern in step:
+                    yield pattern
+            elif segment is not None:
+                for pattern in step.get(segment, ()):
+                    yield pattern
+
+    def resolve(self, path):
+        match = self.regex.search(path)
+        if not match:
+            raise urlresolvers.Resolver404({'path': path})
+
+        tried = []
+        new_path = path[match.end():]
+        for pattern in self._candidates(new_path):
+            try:
+                sub_match = pattern.resolve(new_path)
+            except urlresolvers.Resolver404 as e:
+                sub_tried = e.args[0].get('tried')
+                if sub_tried is not None:
+                    tried.extend([pattern] + t for t in sub_tried)
+                else:
+                    tried.append([pattern])
+            else:
+                if sub_match:
+                    # Own regex has no groups, kwargs and namespace
+                    return sub_match
+                if isinstance(pattern, CombinedPatterns):
+                    tried.extend([p] for p in pattern.patterns)
+                else:
+                    tried.append([pattern])
+
+        raise urlresolvers.Resolver404({'tried': tried, 'path': new_path})
+
+
+class ReverseIndex(object):
+    """
+    Prebuilt `name => url templates` index, reverses url names same way as
+    :func:`django.core.urlresolvers.reverse` does for flat urlconf.
+    """
+    def __init__(self, urls=()):
+        self._index = {}
+        self._checks = {}
+        self._prefixes = {}
+        self.add(urls)
+
+    def add(self, urls):
+        for url_obj in urls:
+            if url_obj.name is not None:
+                pattern = url_obj.regex.pattern
+                if pattern.startswith('^'):
+                    pattern = pattern[1:]
+
+                # Like django, last defined url of same name is tried first
+                possibility = (normalize(pattern), pattern,
+                               url_obj.default_args)
+                self._index.setdefault(url_obj.name, []).insert(0, possibility)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def _check(self, prefix_norm, pattern):
+        key = (prefix_norm, pattern)
+        if key not in self._checks:
+            self._checks[key] = re.compile('^%s%s' % key, re.UNICODE)
+        return self._checks[key]
+
+    def reverse(self, name, args=None, kwargs=None, prefix='/'):
+        """
+        Returns url or `None` if no url matches given name and arguments.
+        """
+        args, kwargs = args or [], kwargs or {}
+        if args and kwargs:
+            raise ValueError(
+                "Don't mix *args and **kwargs in call to reverse()!")
+
+        if prefix not in self._prefixes:
+            self._prefixes[prefix] = normalize(urlquote(prefix))[0]
+        prefix_norm, prefix_args = self._prefixes[prefix]
+        text_args = [force_text(v) for v in args]
+        text_kwargs = dict((k, force_text(v)) for (k, v) in kwargs.items())
+
+        for possibility, pattern, defaults in self._index.get(name, ()):
+            for result, params in possibility:
+                if args:
+                    if len(args) != len(params) + len(prefix_args):
+                        continue
+                    candidate_subs = dict(zip(prefix_args + params, text_args))
+                else:
+                    if (set(kwargs) | set(defaults) !=
+                            set(params) | set(defaults) | set(prefix_args)):
+                        continue
+                    if any(kwargs.get(k, v) != v for k, v in defaults.items()):
+                        continue
+                    candidate_subs = text_kwargs
+
+                candidate_pat = prefix_norm.replace('%', '%%') + result
+                check = self._check(prefix_norm, pattern)
+                if check.search(candidate_pat % candidate_subs):
+                    candidate_subs = dict((k, urlquote(v)) for (k, v)
+                                          in candidate_subs.items())
+                    url = candidate_pat % candidate_subs
+                    if url.startswith('//'):
+                        url = '/%%2F%s' % url[2:]
+                    return iri_to_uri(url)
+
+        return None
+
+
+def fast_reverse(viewname, urlconf=None, args=None, kwargs=None, prefix=None,
+                 current_app=None):
+    """
+    Reverses url name with ``reverse_index`` of urlconf module if it has one
+    (e.g. ``reverse_index = root.reverse_index()``), falls back to
+    :func:`django.core.urlresolvers.reverse` for namespaced names, views
+    and names not found in index.
+    """
+    urlconf_name = (urlconf or urlresolvers.get_urlconf() or
+                    settings.ROOT_URLCONF)
+    if isinstance(urlconf_name, six.string_types):
+        urlconf_module = importlib.import_module(urlconf_name)
+    else:
+        urlconf_module = urlconf_name
+
+    index = getattr(urlconf_module, 'reverse_index', None)
+    if (isinstance(index, ReverseIndex) and
+            isinstance(viewname, six.string_types) and
+            viewname in index and '.' not in viewname):
+        if prefix is None:
+            prefix = urlresolvers.get_script_prefix()
+
+        url = index.reverse(viewname, args, kwargs, prefix)
+        if url is not None:
+            return url
+
+    return urlresolvers.reverse(viewname, urlconf, args, kwargs, prefix,
+                                current_app)
+
+
+def _view_path(url_obj):
+    """
+    Returns importable dotted path of url's view.
+    """
+    callback_str = getattr(url_obj, '_callback_str', None)
+    if callback_str and url_obj._callback is None:
+        return callback_str
+
+    view = url_obj.callback
+    view = getattr(view, 'view_class', view)
+    module_name = getattr(view, '__module__', None)
+    name = getattr(view, '__name__', None)
+    if module_name and name:
+        try:
+            module = importlib.import_module(module_name)
+            if getattr(module, name, None) is view:
+                return '%s.%s' % (module_name, name)
+        except ImportError:
+            pass
+
+    raise ValueError('View of "%s" url is not importable: %r' %
+                     (url_obj.regex.pattern, view))
+
+
+def dump_urls(urls, path, sources):
+    """
+    Writes Python module with regexes, names, views dotted paths and kwargs of
+    given urls (e.g. :attr:`Scope.urls`) and checksum of `sources` files.
+
+    Raises :class:`ValueError` if view of any url is not importable by
+    dotted path or it's kwargs can not be written as literal, includes are
+    not supported.
+    """
+    entries = []
+    for url_obj in urls:
+        if isinstance(url_obj, urlresolvers.RegexURLResolver):
+            raise ValueError('"%s" url is an include, includes are not '
+                             'supported' % url_obj.regex.pattern)
+        entry = (url_obj.regex.pattern, _view_path(url_obj),
+                 url_obj.default_args or None, url_obj.name)
+        if ast.literal_eval(repr(entry)) != entry:
+            raise ValueError('Kwargs of "%s" url can not be written: %r' %
+                             (entry[0], entry[2]))
+        entries.append(entry)
+
+    lines = ['# Generated by classsettings.urls.dump_urls, do not edit',
+             'CHECKSUM = %r' % files_digest(sources).hexdigest(),
+             'URLS = [']
+    lines.extend('    %r,' % (entry,) for entry in entries)
+    lines.append(']\n')
+
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temp_path, 'w') as snapshot:
+        snapshot.write('\n'.join(lines))
+    os.rename(temp_path, path)
+
+
+def load_urls(module_name, sources):
+    """
+    Returns urls of snapshot module written with :func:`dump_urls` or `None`
+    if it does not exist or checksum of `sources` files differs. Views are
+    imported on first access.
+    """
+    try:
+        snapshot = importlib.import_module(module_name)
+        if snapshot.CHECKSUM != files_digest(sources).hexdigest():
+            return None
+
+        return [LazyURLPattern(regex, None, view, kwargs, name)
+                for regex, view, kwargs, name in snapshot.URLS]
+    except Exception:
+        # Missing, corrupted or incompatible snapshot, missing sources
+        return None
+
+
 def url(regex, view, kwargs=None, name=None, prefix=''):
     """
     Shortcut for ``url`` method of current scope.
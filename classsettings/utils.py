@@ -1,5 +1,29 @@
+import copy
 import functools
 
+from django.utils import six
+
+
+_SCALARS = (type(None), bool, float, complex, six.binary_type,
+            six.text_type) + six.integer_types
+
+
+def fresh(value):
+    """
+    Returns deep copy of cached value unless it's immutable scalar, so
+    callers sharing cache do not see each other's modifications.
+    """
+    return value if isinstance(value, _SCALARS) else copy.deepcopy(value)
+
+
+def improperly_configured(message):
+    """
+    Returns Django's :class:`ImproperlyConfigured` exception, it's module is
+    imported on first error only.
+    """
+    from django.core.exceptions import ImproperlyConfigured
+    return ImproperlyConfigured(message)
+
 
 def defaultargs(func):
     """